@@ -0,0 +1,100 @@
+"""Parse micro-benchmark of the JSON decoders on synthetic payloads of every TrendReq endpoint
+
+Each payload has the shape and a realistic size of the endpoint's response, including the
+XSSI prefix that _get_data trims. Three paths are timed:
+    text+json   -- the previous path, response.text[trim_chars:] then json.loads
+    view+json   -- memoryview of the body, decoders.stdlib_loads
+    view+orjson -- memoryview of the body, decoders.orjson_loads (if orjson is installed)
+
+Usage: python benchmarks/bench_decoders.py [--number 20]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from pytrends import decoders
+
+random.seed(0)
+
+
+def _timeline(points, keywords):
+    return [{'time': str(1600000000 + i * 3600), 'formattedTime': f'Sep {i % 30 + 1}, 2020',
+             'formattedAxisTime': f'Sep {i % 30 + 1}', 'value': [random.randint(0, 100)] * keywords,
+             'hasData': [True] * keywords, 'formattedValue': ['50'] * keywords}
+            for i in range(points)]
+
+
+def _geo_map(regions, keywords):
+    return [{'geoCode': f'US-{i:04d}', 'geoName': f'Region {i}', 'value': [random.randint(0, 100)] * keywords,
+             'formattedValue': ['50'] * keywords, 'maxValueIndex': 0, 'hasData': [True] * keywords,
+             'coordinates': {'lat': random.uniform(-90, 90), 'lng': random.uniform(-180, 180)}}
+            for i in range(regions)]
+
+
+def _ranked(count):
+    return [{'query': f'query number {i}', 'value': 100 - i % 100, 'formattedValue': str(100 - i % 100),
+             'hasData': True, 'link': f'/trends/explore?q=query+{i}'} for i in range(count)]
+
+
+def _stories(count):
+    return [{'title': f'Story {i}, Person {i}, Place {i}', 'entityNames': [f'Person {i}', f'Place {i}'],
+             'image': {'newsUrl': f'https://news.example.com/{i}', 'source': 'Example', 'imgUrl': '//img'},
+             'articles': [{'articleTitle': f'Article {i}-{j}', 'url': f'https://news.example.com/{i}/{j}',
+                           'source': 'Example', 'time': '1 hour ago', 'snippet': 'x' * 200}
+                          for j in range(5)],
+             'idsForDedup': [f'/m/{i}', f'/m/{i + 1}'], 'id': str(i)} for i in range(count)]
+
+
+# endpoint -> (trim_chars, payload)
+PAYLOADS = {
+    'explore': (4, {'widgets': [{'id': name, 'token': 'x' * 120, 'request': {'comparisonItem': [
+        {'keyword': 'kw', 'geo': {}, 'time': 'today 5-y'}] * 5, 'resolution': 'COUNTRY'}}
+        for name in ['TIMESERIES', 'GEO_MAP'] + ['RELATED_TOPICS', 'RELATED_QUERIES'] * 5]}),
+    'multiline': (5, {'default': {'timelineData': _timeline(261, 5), 'averages': [50] * 5}}),
+    'multirange': (5, {'default': {'timelineData': [{'columnData': [
+        {'time': '1600000000', 'formattedTime': 'Sep 1', 'value': 50, 'hasData': True}] * 5}] * 261,
+        'averages': [50] * 5}}),
+    'comparedgeo (CITY)': (5, {'default': {'geoMapData': _geo_map(5000, 5)}}),
+    'relatedsearches': (5, {'default': {'rankedList': [{'rankedKeyword': _ranked(25)},
+                                                       {'rankedKeyword': _ranked(25)}]}}),
+    'dailytrends': (5, {'default': {'trendingSearchesDays': [{'trendingSearches': [
+        {'title': {'query': f'search {i}'}, 'formattedTraffic': '100K+', 'articles': _stories(1)[0]['articles']}
+        for i in range(20)]}]}}),
+    'realtimetrends': (5, {'storySummaries': {'trendingStories': _stories(300)}}),
+    'topcharts': (5, {'topCharts': [{'listItems': [{'title': f'item {i}', 'exploreUrl': '/x'}
+                                                   for i in range(10)]}]}),
+    'autocomplete': (5, {'default': {'topics': [{'mid': f'/m/{i}', 'title': f'Topic {i}', 'type': 'Topic'}
+                                                for i in range(5)]}}),
+    'categories': (5, {'children': [{'name': f'Category {i}', 'id': i, 'children': [
+        {'name': f'Sub {i}.{j}', 'id': i * 100 + j} for j in range(20)]} for i in range(30)],
+        'name': 'All categories', 'id': 0}),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    paths = {
+        'text+json': lambda body, trim: json.loads(body.decode('utf-8')[trim:]),
+        'view+json': lambda body, trim: decoders.stdlib_loads(memoryview(body)[trim:]),
+    }
+    if decoders.orjson is not None:
+        paths['view+orjson'] = lambda body, trim: decoders.orjson_loads(memoryview(body)[trim:])
+
+    print(f'{"endpoint":<20}{"size":>10}' + ''.join(f'{name:>14}' for name in paths))
+    for endpoint, (trim_chars, payload) in PAYLOADS.items():
+        body = b")]}',\n"[:trim_chars] + json.dumps(payload).encode('utf-8')
+        row = f'{endpoint:<20}{len(body) / 1024:>8.0f}KB'
+        for parse in paths.values():
+            assert parse(body, trim_chars) == payload
+            seconds = min(timeit.repeat(lambda: parse(body, trim_chars), number=args.number,
+                                        repeat=3)) / args.number
+            row += f'{seconds * 1e6:>12.0f}us'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
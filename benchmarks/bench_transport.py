@@ -0,0 +1,166 @@
+"""Compare RequestsTransport and HTTP2Transport on TrendReq's widget workload against local stub servers
+
+The stub servers answer every request after a fixed delay, standing in for Google's latency.
+One round is what a caller of TrendReq sends for a payload: build_payload (the explore
+request), interest_over_time, interest_by_region, related_topics and related_queries, the
+last two sending one relatedsearches request per keyword, max_workers of them at once.
+
+Usage: python benchmarks/bench_transport.py [--keywords 5] [--workers 5] [--delay 0.1] [--rounds 5]
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from h2stub import H2StubServer, route  # noqa: E402
+from pytrends import request  # noqa: E402
+from pytrends.request import TrendReq  # noqa: E402
+from pytrends.transport import HTTP2Transport, RequestsTransport  # noqa: E402
+
+# the TrendReq urls sent to the stub servers instead of Google
+URLS = ('GENERAL_URL', 'INTEREST_OVER_TIME_URL', 'INTEREST_BY_REGION_URL', 'RELATED_QUERIES_URL')
+
+
+def make_bodies(keywords):
+    """Return the stub response of every endpoint a round requests, by the last segment of its path"""
+    kw_list = [f'keyword {i}' for i in range(keywords)]
+    widgets = [{'id': 'TIMESERIES', 'token': 't', 'request': {}},
+               {'id': 'GEO_MAP', 'token': 'g', 'request': {'resolution': 'COUNTRY'}}]
+    for kind in ('RELATED_TOPICS', 'RELATED_QUERIES'):
+        widgets.extend({'id': f'{kind}_{i}', 'token': 'r', 'request': {'restriction': {
+            'complexKeywordsRestriction': {'keyword': [{'value': kw}]}}}}
+            for i, kw in enumerate(kw_list))
+    ranked = [{'query': f'query {i}', 'value': 100 - i,
+               'topic': {'mid': f'/m/{i}', 'title': f'Topic {i}', 'type': 'Topic'}}
+              for i in range(25)]
+    return kw_list, {
+        'explore': b")]}'" + json.dumps({'widgets': widgets}).encode('utf-8'),
+        'multiline': b")]}',\n" + json.dumps({'default': {'timelineData': [
+            {'time': str(1600000000 + i * 3600), 'value': [i % 100] * keywords}
+            for i in range(200)]}}).encode('utf-8'),
+        'comparedgeo': b")]}',\n" + json.dumps({'default': {'geoMapData': [
+            {'geoName': f'Country {i}', 'geoCode': f'C{i}', 'value': [i % 100] * keywords}
+            for i in range(250)]}}).encode('utf-8'),
+        'relatedsearches': b")]}',\n" + json.dumps({'default': {'rankedList': [
+            {'rankedKeyword': ranked}, {'rankedKeyword': ranked}]}}).encode('utf-8'),
+    }
+
+
+class H1StubServer(object):
+    """HTTP/1.1 stub answering every request with its body, gzip-compressed, after delay seconds
+
+    bodies maps the last segment of a request's path to its body, like H2StubServer
+    """
+
+    def __init__(self, bodies, delay):
+        compressed = {name: gzip.compress(body) for name, body in bodies.items()}
+        stub = self
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                time.sleep(delay)
+                body = compressed.get(route(self.path), compressed.get(''))
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=UTF-8')
+                self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def point_at(url):
+    """Send TrendReq's requests, the cookie one included, to url and return the previous urls"""
+    previous = {name: getattr(TrendReq, name) for name in URLS}
+    previous['BASE_TRENDS_URL'] = request.BASE_TRENDS_URL
+    for name in URLS:
+        setattr(TrendReq, name, getattr(TrendReq, name).replace(request.BASE_TRENDS_URL, url))
+    request.BASE_TRENDS_URL = url
+    return previous
+
+
+def restore(previous):
+    request.BASE_TRENDS_URL = previous.pop('BASE_TRENDS_URL')
+    for name, url in previous.items():
+        setattr(TrendReq, name, url)
+
+
+def one_round(pytrends, kw_list):
+    """Fetch every widget of a payload the way a TrendReq caller does and return the seconds taken"""
+    started = time.perf_counter()
+    pytrends.build_payload(kw_list)
+    pytrends.interest_over_time()
+    pytrends.interest_by_region()
+    topics = pytrends.related_topics()
+    queries = pytrends.related_queries()
+    assert set(topics) == set(queries) == set(kw_list)
+    return time.perf_counter() - started
+
+
+def run(name, transport, server, kw_list, workers, rounds):
+    with server:
+        previous = point_at(server.url)
+        try:
+            pytrends = TrendReq(transport=transport, max_workers=workers)
+            one_round(pytrends, kw_list)  # warm up
+            timings = [one_round(pytrends, kw_list) for _ in range(rounds)]
+        finally:
+            restore(previous)
+            transport.close()
+    best, mean = min(timings), sum(timings) / len(timings)
+    print(f'{name:<10} best {best * 1000:8.1f} ms   mean {mean * 1000:8.1f} ms   '
+          f'connections {server.connections}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keywords', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=5, help='TrendReq max_workers')
+    parser.add_argument('--delay', type=float, default=0.1)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    kw_list, bodies = make_bodies(args.keywords)
+    print(f'{args.keywords} keywords, {2 * args.keywords + 3} requests per round, '
+          f'max_workers {args.workers}, {args.delay * 1000:.0f} ms server delay, '
+          f'{args.rounds} rounds')
+    run('HTTP/1.1', RequestsTransport(), H1StubServer(bodies, args.delay), kw_list,
+        args.workers, args.rounds)
+    run('HTTP/2', HTTP2Transport(http1=False), H2StubServer(bodies, args.delay), kw_list,
+        args.workers, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+from hashlib import sha256
+from itertools import islice
+import json
+import os
+
+import pandas as pd
+
+
+def content_digest(data):
+    """Return a digest of a dataframe, or of any JSON serializable records"""
+    h = sha256()
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        columns = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+        h.update(json.dumps(columns, default=str).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    else:
+        h.update(json.dumps(data, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+def make_key(source, keyword='', geo='', timeframe=''):
+    """Build the key a window is stored under from its source, keyword, geo and timeframe"""
+    return json.dumps([source, keyword, geo, timeframe])
+
+
+class JsonDigestStore(object):
+    """
+    Keeps the digests in a local JSON file, read once and rewritten on save
+    """
+
+    def __init__(self, path='content_digests.json'):
+        self.path = path
+        self.digests = dict()
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as file:
+                self.digests = json.load(file)
+
+    def get_many(self, keys):
+        """Return a dictionary of key -> digest for the keys that have one"""
+        return {key: self.digests[key] for key in keys if key in self.digests}
+
+    def save(self, digests):
+        self.digests.update(digests)
+        # write to a temporary file first so a crash never leaves a truncated store
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.digests, file)
+        os.replace(tmp_path, self.path)
+
+
+class PostgresDigestStore(object):
+    """
+    Keeps the digests in a PostgreSQL table, created if it does not exist
+
+    Only the digests of the keys being checked are read, so the table can hold one
+    row per record without every run reading all of it.
+    """
+
+    def __init__(self, connection, table='api_data.content_digests'):
+        self.connection = connection
+        self.table = table
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+                """
+            )
+        self.connection.commit()
+
+    def get_many(self, keys):
+        """Return a dictionary of key -> digest for the keys that have one"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT key, digest FROM {self.table} WHERE key = ANY(%s)',
+                           (list(keys),))
+            return dict(cursor.fetchall())
+
+    def save(self, digests):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {self.table} (key, digest) VALUES (%s, %s)
+                ON CONFLICT (key) DO UPDATE SET digest = EXCLUDED.digest, updated_at = now()
+                """,
+                list(digests.items())
+            )
+        self.connection.commit()
+
+
+class ChangeDetector(object):
+    """
+    Drops fetched windows and records whose content did not change since they were last written
+
+    Digests are only staged by changed() and are persisted by save(), which should be
+    called once the data has been written, so that a failed write is retried on the next run.
+    """
+
+    def __init__(self, store=None, batch_size=500):
+        """
+        :param store: a JsonDigestStore, a PostgresDigestStore or any object with get_many() and save()
+        :param batch_size: how many records changed_records looks up in the store at once
+        """
+        self.store = store or JsonDigestStore()
+        self.batch_size = batch_size
+        self._staged = dict()
+
+    def _changed(self, digests):
+        """Stage and return the keys of a key -> digest dictionary whose digest changed"""
+        unstaged = [key for key in digests if key not in self._staged]
+        previous = self.store.get_many(unstaged) if unstaged else dict()
+        previous.update((key, self._staged[key]) for key in digests if key in self._staged)
+        changed = [key for key, digest in digests.items() if previous.get(key) != digest]
+        self._staged.update((key, digests[key]) for key in changed)
+        return set(changed)
+
+    def changed(self, key, data):
+        """Return True if data differs from what was last saved under key, and stage its digest
+
+        :param key: a key built by make_key, e.g. make_key('pytrends', keyword, geo, timeframe)
+        :param data: a dataframe or JSON serializable records
+        """
+        return key in self._changed({key: content_digest(data)})
+
+    def changed_records(self, source, records, key_field='id'):
+        """Yield only the records that changed since they were last saved, keyed by their key_field
+
+        Records are looked up in the store batch_size at a time
+        """
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            keys = [make_key(source, str(record[key_field])) for record in batch]
+            changed = self._changed({key: content_digest(record) for key, record in zip(keys, batch)})
+            for key, record in zip(keys, batch):
+                if key in changed:
+                    yield record
+
+    def save(self):
+        """Persist the staged digests"""
+        if not self._staged:
+            return
+        self.store.save(self._staged)
+        self._staged = dict()
@@ -5,6 +5,7 @@ from calendar import monthrange
 
 import pandas as pd
 
+from pytrends.changes import make_key
 from pytrends.exceptions import ResponseError
 from pytrends.request import TrendReq
 
@@ -52,7 +53,8 @@ def get_daily_data(word: str,
                  stop_mon: int,
                  geo: str = 'US',
                  verbose: bool = True,
-                 wait_time: float = 5.0) -> pd.DataFrame:
+                 wait_time: float = 5.0,
+                 detector=None) -> pd.DataFrame:
     """Given a word, fetches daily search volume data from Google Trends and
     returns results in a pandas DataFrame.
 
@@ -74,6 +76,10 @@ def get_daily_data(word: str,
         geo (str): geolocation
         verbose (bool): If True, then prints the word and current time frame
             we are fecthing the data for.
+        detector (ChangeDetector): If given, only the rows of the months whose
+            daily window changed since the last run are returned, or every row
+            if the monthly window changed (it rescales all of them). Call
+            detector.save() once the returned rows have been written.
 
     Returns:
         complete (pd.DataFrame): Contains 4 columns.
@@ -105,6 +111,8 @@ def get_daily_data(word: str,
 
     # Get daily data, month by month
     results = {}
+    # months whose daily window did not change since the last run
+    unchanged = []
     # if a timeout or too many requests error occur we need to adjust wait time
     current = start_date
     while current < stop_date:
@@ -113,6 +121,9 @@ def get_daily_data(word: str,
         if verbose:
             print(f'{word}:{timeframe}')
         results[current] = _fetch_data(pytrends, build_payload, timeframe)
+        if detector is not None and not detector.changed(
+                make_key('dailydata', word, geo, timeframe), results[current]):
+            unchanged.append((current, last_date_of_month))
         current = last_date_of_month + timedelta(days=1)
         sleep(wait_time)  # don't go too fast or Google will send 429s
 
@@ -124,4 +135,12 @@ def get_daily_data(word: str,
     complete['scale'] = complete[f'{word}_monthly'] / 100
     complete[word] = complete[f'{word}_unscaled'] * complete.scale
 
+    monthly_timeframe = convert_dates_to_timeframe(start_date, stop_date)
+    if detector is not None and not detector.changed(
+            make_key('dailydata', word, geo, monthly_timeframe), monthly):
+        # the scale did not change either, so unchanged months need no rewrite
+        for first, last in unchanged:
+            complete = complete[(complete.index < pd.Timestamp(first)) |
+                                (complete.index > pd.Timestamp(last))]
+
     return complete
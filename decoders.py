@@ -0,0 +1,42 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib parser is used without it
+    orjson = None
+
+
+def stdlib_loads(data):
+    """Parse JSON from bytes or a memoryview with the stdlib json module"""
+    # json.loads does not take a memoryview, decoding it is the one copy needed
+    return json.loads(str(data, 'utf-8'))
+
+
+def orjson_loads(data):
+    """Parse JSON from bytes or a memoryview with orjson, without copying the buffer"""
+    return orjson.loads(data)
+
+
+DECODERS = {'json': stdlib_loads}
+if orjson is not None:
+    DECODERS['orjson'] = orjson_loads
+
+DEFAULT_DECODER = orjson_loads if orjson is not None else stdlib_loads
+
+
+def get_decoder(decoder=None):
+    """Return a JSON decoder given its name, a callable or None for the fastest one available
+
+    The returned decoder takes a memoryview of the response body. The built-in decoders
+    parse it directly; any other callable, e.g. json.loads, is wrapped to receive bytes.
+    """
+    if decoder is None:
+        return DEFAULT_DECODER
+    if decoder in DECODERS.values():
+        return decoder
+    if callable(decoder):
+        return lambda data: decoder(bytes(data))
+    try:
+        return DECODERS[decoder]
+    except KeyError:
+        raise ValueError(f'Unknown JSON decoder {decoder!r}, available: {", ".join(DECODERS)}')
@@ -0,0 +1,245 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from pytrends.ratelimit import RateLimiter
+
+
+PAGINATION_STYLES = (None, 'page', 'offset', 'cursor', 'link')
+
+
+class Source(object):
+    """
+    Declaration of a REST API to ingest into a table
+
+    The pagination styles are:
+        None     -- a single request returns every record
+        'page'   -- page_param is incremented from start_page, size_param sets the page size
+        'offset' -- offset_param is incremented by the page size, size_param sets the page size
+        'cursor' -- the next cursor is read from cursor_path in the response and sent as cursor_param
+        'link'   -- the next url is read from the response's Link header
+
+    For page and offset sources the first page is fetched alone. Its length is taken as the
+    page size the API actually serves, since many APIs cap the size they are asked for, and
+    the following pages are requested with that size. Paging stops at the first empty page
+    or page shorter than that.
+    """
+
+    def __init__(self, name, endpoint, table, columns, key='id', pagination=None,
+                 record_path=(), params=None, page_size=100, page_param='page',
+                 size_param='limit', start_page=1, offset_param='offset',
+                 cursor_param='cursor', cursor_path=(), rate_limit=None, max_pages=None,
+                 upsert=False):
+        """
+        :param name: a name for the source, used in messages
+        :param endpoint: the url of the first page
+        :param table: the table the records are written to, e.g. 'api_data.posts'
+        :param columns: the record fields written to the table, named as the table's columns
+        :param key: the column the table is unique on
+        :param pagination: one of PAGINATION_STYLES
+        :param record_path: the keys leading to the list of records in a response (empty if the response is the list)
+        :param params: query parameters sent with every request
+        :param page_size: the page size asked for, the API may serve smaller pages
+        :param rate_limit: the maximum number of requests per second sent to this source
+        :param max_pages: stop after this many pages
+        :param upsert: if True, existing rows are updated instead of left as they are
+        """
+        if pagination not in PAGINATION_STYLES:
+            raise ValueError(f'pagination must be one of {PAGINATION_STYLES}')
+        if pagination == 'cursor' and not cursor_path:
+            raise ValueError('cursor pagination needs the cursor_path of the next cursor in a response')
+        self.name = name
+        self.endpoint = endpoint
+        self.table = table
+        self.columns = tuple(columns)
+        self.key = key
+        self.pagination = pagination
+        self.record_path = tuple(record_path)
+        self.params = params or {}
+        self.page_size = page_size
+        self.page_param = page_param
+        self.size_param = size_param
+        self.start_page = start_page
+        self.offset_param = offset_param
+        self.cursor_param = cursor_param
+        self.cursor_path = tuple(cursor_path)
+        self.rate_limit = rate_limit
+        self.max_pages = max_pages
+        self.upsert = upsert
+
+    def insert_query(self):
+        """Return the INSERT statement used to write one record"""
+        columns = ', '.join(self.columns)
+        placeholders = ', '.join(['%s'] * len(self.columns))
+        if self.upsert:
+            updates = ', '.join(f'{c} = EXCLUDED.{c}' for c in self.columns if c != self.key)
+            conflict = f'DO UPDATE SET {updates}' if updates else 'DO NOTHING'
+        else:
+            conflict = 'DO NOTHING'
+        return (f'INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) '
+                f'ON CONFLICT ({self.key}) {conflict}')
+
+
+def _walk(payload, path):
+    """Follow path into payload, returning None if any step of it is missing"""
+    for key in path:
+        try:
+            payload = payload[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return payload
+
+
+class Ingestor(object):
+    """
+    Fetches the pages of Sources concurrently over one pooled session and writes
+    their records to PostgreSQL in batches
+    """
+
+    def __init__(self, max_workers=8, batch_size=500, timeout=(2, 30), session=None):
+        """
+        :param max_workers: how many pages are prefetched at once for page and offset sources
+        :param batch_size: how many records are written per executemany
+        :param timeout: the requests timeout used for every page
+        :param session: the requests session to use, a pooled one is created if None
+        """
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.timeout = timeout
+        if session is None:
+            session = requests.session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self._limiters = dict()
+
+    def _limiter(self, source):
+        if source.name not in self._limiters:
+            self._limiters[source.name] = RateLimiter(source.rate_limit)
+        return self._limiters[source.name]
+
+    def _get(self, source, url, params=None):
+        self._limiter(source).wait()
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _page(self, source, index, page_size):
+        """Fetch the records of a page or offset source's index-th page of page_size records"""
+        params = dict(source.params)
+        params[source.size_param] = page_size
+        if source.pagination == 'page':
+            params[source.page_param] = source.start_page + index
+        else:
+            params[source.offset_param] = index * page_size
+        response = self._get(source, source.endpoint, params)
+        return _walk(response.json(), source.record_path) or []
+
+    def _numbered_pages(self, source, executor):
+        indexes = count()
+        if source.max_pages is not None:
+            indexes = islice(indexes, source.max_pages)
+        if next(indexes, None) is None:
+            return
+        # the first page tells how many records the API really serves per page
+        records = self._page(source, 0, source.page_size)
+        if not records:
+            return
+        page_size = len(records)
+        yield records
+        # keep max_workers pages in flight and stop at the first empty or short page
+        in_flight = deque(executor.submit(self._page, source, index, page_size)
+                          for index in islice(indexes, self.max_workers))
+        while in_flight:
+            records = in_flight.popleft().result()
+            if len(records) < page_size:
+                for future in in_flight:
+                    future.cancel()
+                if records:
+                    yield records
+                return
+            index = next(indexes, None)
+            if index is not None:
+                in_flight.append(executor.submit(self._page, source, index, page_size))
+            yield records
+
+    def _linked_page(self, source, url, params):
+        response = self._get(source, url, params)
+        payload = response.json()
+        records = _walk(payload, source.record_path) or []
+        if source.pagination == 'link':
+            next_page = response.links.get('next', {}).get('url'), None
+        else:
+            cursor = _walk(payload, source.cursor_path)
+            next_page = None, None
+            if cursor and records:
+                next_page = source.endpoint, dict(source.params, **{source.cursor_param: cursor})
+        return records, next_page
+
+    def _chained_pages(self, source, executor):
+        # the next url is only known once a page arrived, so the next page is
+        # requested before the current one is handed to the loader
+        future = executor.submit(self._linked_page, source, source.endpoint, dict(source.params))
+        fetched = 0
+        while future is not None:
+            records, (url, params) = future.result()
+            fetched += 1
+            future = None
+            if url and (source.max_pages is None or fetched < source.max_pages):
+                future = executor.submit(self._linked_page, source, url, params)
+            if records:
+                yield records
+
+    def pages(self, source):
+        """Yield the lists of records of a source, page by page and in order"""
+        if source.pagination is None:
+            response = self._get(source, source.endpoint, source.params)
+            yield _walk(response.json(), source.record_path) or []
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            if source.pagination in ('page', 'offset'):
+                yield from self._numbered_pages(source, executor)
+            else:
+                yield from self._chained_pages(source, executor)
+
+    def records(self, source):
+        """Yield the records of a source one at a time"""
+        for page in self.pages(source):
+            yield from page
+
+    def load(self, source, connection, records):
+        """Write records to the source's table in batches and return how many were sent"""
+        query = source.insert_query()
+        sent = 0
+        with connection.cursor() as cursor:
+            batch = list()
+            for record in records:
+                batch.append(tuple(record[column] for column in source.columns))
+                if len(batch) >= self.batch_size:
+                    cursor.executemany(query, batch)
+                    sent += len(batch)
+                    batch = list()
+            if batch:
+                cursor.executemany(query, batch)
+                sent += len(batch)
+        connection.commit()
+        return sent
+
+    def ingest(self, source, connection, detector=None):
+        """Fetch every record of a source and write them to its table
+
+        If a changes.ChangeDetector is given, records that did not change since the last
+        run are dropped before they reach the database
+        """
+        records = self.records(source)
+        if detector is not None:
+            records = detector.changed_records(source.name, records, source.key)
+        sent = self.load(source, connection, records)
+        if detector is not None:
+            detector.save()
+        return sent
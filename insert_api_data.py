@@ -1,5 +1,24 @@
 import psycopg
-import requests
+
+from pytrends.changes import ChangeDetector, PostgresDigestStore
+from pytrends.ingest import Ingestor, Source
+
+# Sources to ingest, add new APIs here
+JSONPLACEHOLDER_POSTS = Source(
+    name='jsonplaceholder',
+    endpoint="https://jsonplaceholder.typicode.com/posts",
+    table='api_data.jsonplaceholder_data',
+    columns=('id', 'title', 'body'),
+    key='id',
+    pagination='page',
+    page_param='_page',
+    size_param='_limit',
+    page_size=20,
+    rate_limit=10,  # requests per second
+    upsert=True,  # only changed records are sent, so update them
+)
+
+SOURCES = [JSONPLACEHOLDER_POSTS]
 
 # Step 1: Connect to PostgreSQL using Psycopg 3
 with psycopg.connect(
@@ -9,25 +28,13 @@ with psycopg.connect(
     host="localhost",
     port=5432
 ) as connection:
-    # Create a cursor for executing queries
-    with connection.cursor() as cursor:
-
-        # Step 2: Fetch Data from the API
-        response = requests.get("https://jsonplaceholder.typicode.com/posts")
-        data = response.json()
-
-        # Step 3: Insert Data into PostgreSQL
-        for item in data:
-            cursor.execute(
-                """
-                INSERT INTO api_data.jsonplaceholder_data (id, title, body)
-                VALUES (%s, %s, %s)
-                ON CONFLICT (id) DO NOTHING
-                """,
-                (item['id'], item['title'], item['body'])
-            )
-        
-        # Commit changes
-        connection.commit()
+    # Step 2: Fetch the pages of every source concurrently
+    # Step 3: Insert the records into PostgreSQL in batches as they arrive
+    # Unchanged records are dropped before they are written
+    ingestor = Ingestor(max_workers=8)
+    detector = ChangeDetector(PostgresDigestStore(connection))
+    for source in SOURCES:
+        inserted = ingestor.ingest(source, connection, detector)
+        print(f"{source.name}: {inserted} records sent")
 
 print("Data inserted successfully!")
@@ -1,6 +1,8 @@
 # PulledFriends.py
+import os
 import time
 from pytrends.request import TrendReq
+from pytrends.changes import ChangeDetector, make_key
 import pandas as pd
 
 # Documentation link for PyTrends: https://github.com/GeneralMills/pytrends
@@ -43,10 +45,16 @@ def fetch_trends_data(keywords_list):
 print(f"Fetching trends for keywords: {keywords}")
 trends_data = fetch_trends_data(keywords)
 
-# Save data to CSV
+# Save data to CSV, unless it has not changed since the last run
+detector = ChangeDetector()
+window = make_key('pytrends', ','.join(keywords), '', 'now 7-d')
+file_name = "google_trends_technology_ai.csv"
 if trends_data is not None:
-    file_name = "google_trends_technology_ai.csv"
-    trends_data.to_csv(file_name)
-    print(f"Data saved successfully to {file_name}")
+    if detector.changed(window, trends_data) or not os.path.exists(file_name):
+        trends_data.to_csv(file_name)
+        detector.save()
+        print(f"Data saved successfully to {file_name}")
+    else:
+        print(f"Data unchanged, {file_name} left as is.")
 else:
     print("No data to save.")
@@ -0,0 +1,22 @@
+import threading
+import time
+
+
+class RateLimiter(object):
+    """
+    Spaces calls so that at most `rate` of them start every second, across threads
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
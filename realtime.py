@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from hashlib import sha1
+from itertools import product
+import json
+import time
+
+import pandas as pd
+
+from pytrends.exceptions import ResponseError
+from pytrends.transport import TRANSPORT_ERRORS
+
+
+def story_fingerprint(title, entity_names=()):
+    """Return a stable digest of a story's title and entity names"""
+    payload = json.dumps([title, sorted(entity_names or [])], ensure_ascii=False)
+    return sha1(payload.encode('utf-8')).hexdigest()
+
+
+class TrendingPoller(object):
+    """
+    Polls Google's Realtime Search Trends and Daily Trends sections and emits only the stories
+    that are new or have changed since they were last seen
+
+    A story is identified by its feed and title, and its fingerprint covers the title and the
+    entity names, so a story that picks up new entities is emitted again as changed.
+    """
+
+    def __init__(self, pytrends, pns=('US',), cats=('all',), today=False, interval=300,
+                 count=300, max_seen=100000):
+        """
+        :param pytrends: the TrendReq instance used to fetch the feeds
+        :param pns: the geos to poll
+        :param cats: the realtime categories to poll for every geo
+        :param today: also poll the daily trends of every geo
+        :param interval: seconds between the start of two polls
+        :param count: the number of realtime stories to request per feed
+        :param max_seen: how many stories are remembered before the oldest are forgotten
+        """
+        self.pytrends = pytrends
+        self.feeds = [('realtime', pn, cat) for pn, cat in product(pns, cats)]
+        if today:
+            self.feeds.extend(('today', pn, '') for pn in pns)
+        self.interval = interval
+        self.count = count
+        self.max_seen = max_seen
+        self.seen = OrderedDict()
+
+    def _fetch(self, kind, pn, cat):
+        if kind == 'today':
+            titles = self.pytrends.today_searches(pn=pn)
+            return pd.DataFrame({'title': list(titles), 'entityNames': [[] for _ in titles]})
+        return self.pytrends.realtime_trending_searches(pn=pn, cat=cat, count=self.count)
+
+    def _remember(self, key, fingerprint):
+        """Record a fingerprint and return True if it differs from the one previously seen"""
+        previous = self.seen.pop(key, None)
+        self.seen[key] = fingerprint
+        # the seen-set is bounded, evict the least recently seen stories first
+        while len(self.seen) > self.max_seen:
+            self.seen.popitem(last=False)
+        return previous != fingerprint
+
+    def poll_once(self):
+        """Fetch every feed once and return a dataframe of the new or changed stories
+
+        The dataframe has the columns kind, pn, cat, title, entityNames and status,
+        where status is either 'new' or 'changed'
+        """
+        rows = list()
+        for kind, pn, cat in self.feeds:
+            try:
+                df = self._fetch(kind, pn, cat)
+            except (ResponseError, KeyError, IndexError, ValueError) + TRANSPORT_ERRORS as err:
+                # one failing feed, whether the request failed or the payload was
+                # not what we expected, should not stop the others from being polled
+                print(f'{kind}:{pn}:{cat} {err}')
+                continue
+            if df.empty:
+                continue
+            for story in df.to_dict('records'):
+                title = story.get('title')
+                entity_names = story.get('entityNames')
+                # a story without entityNames comes out of to_dict as NaN
+                if not isinstance(entity_names, (list, tuple)):
+                    entity_names = []
+                key = (kind, pn, cat, title)
+                is_new = key not in self.seen
+                if self._remember(key, story_fingerprint(title, entity_names)):
+                    rows.append({'kind': kind, 'pn': pn, 'cat': cat, 'title': title,
+                                 'entityNames': entity_names,
+                                 'status': 'new' if is_new else 'changed'})
+        return pd.DataFrame(rows, columns=['kind', 'pn', 'cat', 'title', 'entityNames', 'status'])
+
+    def run(self, callback, iterations=None):
+        """Poll on a schedule and pass every non-empty batch of new or changed stories to callback
+
+        :param callback: called with the dataframe returned by poll_once
+        :param iterations: stop after this many polls, poll forever if None
+        """
+        done = 0
+        while iterations is None or done < iterations:
+            started = time.monotonic()
+            changes = self.poll_once()
+            if not changes.empty:
+                callback(changes)
+            done += 1
+            if iterations is None or done < iterations:
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
@@ -1,14 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
+import copy
 import json
+import threading
 
 import pandas as pd
 import requests
 
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
 from requests import status_codes
 
 from pytrends import exceptions
+from pytrends.decoders import get_decoder
+from pytrends.ratelimit import RateLimiter
+from pytrends.transport import TRANSPORT_ERRORS, RequestsTransport
 
 from urllib.parse import quote
 
@@ -36,9 +40,18 @@ class TrendReq(object):
     ERROR_CODES = (500, 502, 504, 429)
 
     def __init__(self, hl='en-US', tz=360, geo='', timeout=(2, 5), proxies='',
-                 retries=0, backoff_factor=0, requests_args=None):
+                 retries=0, backoff_factor=0, requests_args=None, transport=None,
+                 decoder=None, max_workers=1):
         """
         Initialize default values for params
+
+        transport sends the requests to Google, it defaults to a RequestsTransport
+        (HTTP/1.1) and can be replaced by e.g. a transport.HTTP2Transport
+        decoder parses the responses, it is 'orjson', 'json', a callable taking bytes
+        (such as json.loads, it is given a copy of the body) or None to use orjson
+        when it is installed
+        max_workers is how many widget requests related_topics and related_queries
+        send at once; above 1 they share one connection with a HTTP2Transport
         """
         # google rate limit
         self.google_rl = 'You have reached your quota limit. Please try again later.'
@@ -52,8 +65,19 @@ class TrendReq(object):
         self.proxies = proxies  # add a proxy option
         self.retries = retries
         self.backoff_factor = backoff_factor
+        self.max_workers = max_workers
         self.proxy_index = 0
+        # guards proxies, proxy_index and cookies when _get_data is called from several threads
+        self._proxy_lock = threading.RLock()
         self.requests_args = requests_args or {}
+        self.transport = transport or RequestsTransport(retries=retries,
+                                                        backoff_factor=backoff_factor)
+        # fail early rather than on the first request
+        if len(self.proxies) > 0 and not self.transport.rotates_proxies:
+            raise ValueError(f'{type(self.transport).__name__} can not rotate proxies, '
+                             f'configure its proxy instead of passing proxies to TrendReq')
+        self.transport.check_args(self.requests_args)
+        self.decoder = get_decoder(decoder)
         self.cookies = self.GetGoogleCookie()
         # intialize widget payloads
         self.token_payload = dict()
@@ -70,11 +94,13 @@ class TrendReq(object):
         Gets google cookie (used for each and every proxy; once on init otherwise)
         Removes proxy from the list on proxy error
         """
+        # sent through the transport so its connection, proxy and TLS settings apply here too
+        url = f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}'
         while True:
             if "proxies" in self.requests_args:
                 try:
-                    return dict(filter(lambda i: i[0] == 'NID', requests.get(
-                        f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}',
+                    return dict(filter(lambda i: i[0] == 'NID', self.transport.request(
+                        'get', url,
                         timeout=self.timeout,
                         **self.requests_args
                     ).cookies.items()))
@@ -84,10 +110,10 @@ class TrendReq(object):
                 if len(self.proxies) > 0:
                     proxy = {'https': self.proxies[self.proxy_index]}
                 else:
-                    proxy = ''
+                    proxy = None
                 try:
-                    return dict(filter(lambda i: i[0] == 'NID', requests.get(
-                        f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}',
+                    return dict(filter(lambda i: i[0] == 'NID', self.transport.request(
+                        'get', url,
                         timeout=self.timeout,
                         proxies=proxy,
                         **self.requests_args
@@ -96,6 +122,8 @@ class TrendReq(object):
                     print('Proxy error. Changing IP')
                     if len(self.proxies) > 1:
                         self.proxies.remove(self.proxies[self.proxy_index])
+                        if self.proxy_index >= len(self.proxies):
+                            self.proxy_index = 0
                     else:
                         print('No more proxies available. Bye!')
                         raise
@@ -119,27 +147,20 @@ class TrendReq(object):
         :param kwargs: any extra key arguments passed to the request builder (usually query parameters or data)
         :return:
         """
-        s = requests.session()
-        # Retries mechanism. Activated when one of statements >0 (best used for proxy)
-        if self.retries > 0 or self.backoff_factor > 0:
-            retry = Retry(total=self.retries, read=self.retries,
-                          connect=self.retries,
-                          backoff_factor=self.backoff_factor,
-                          status_forcelist=TrendReq.ERROR_CODES,
-                          method_whitelist=frozenset(['GET', 'POST']))
-            s.mount('https://', HTTPAdapter(max_retries=retry))
-
-        s.headers.update(self.headers)
-        if len(self.proxies) > 0:
-            self.cookies = self.GetGoogleCookie()
-            s.proxies.update({'https': self.proxies[self.proxy_index]})
-        if method == TrendReq.POST_METHOD:
-            response = s.post(url, timeout=self.timeout,
-                              cookies=self.cookies, **kwargs,
-                              **self.requests_args)  # DO NOT USE retries or backoff_factor here
-        else:
-            response = s.get(url, timeout=self.timeout, cookies=self.cookies,
-                             **kwargs, **self.requests_args)  # DO NOT USE retries or backoff_factor here
+        requests_args = dict(self.requests_args)
+        # requests_args may carry fixed proxies, the rotating proxy takes precedence for https
+        proxies = requests_args.pop('proxies', None)
+        # take a consistent proxy and cookie pair, other threads may rotate them meanwhile
+        with self._proxy_lock:
+            if len(self.proxies) > 0:
+                self.cookies = self.GetGoogleCookie()
+                proxies = dict(proxies or {}, https=self.proxies[self.proxy_index])
+            cookies = self.cookies
+        # DO NOT USE retries or backoff_factor here, the transport handles them
+        response = self.transport.request(method, url, headers=self.headers,
+                                          cookies=cookies, proxies=proxies,
+                                          timeout=self.timeout, **kwargs,
+                                          **requests_args)
         # check if the response contains json and throw an exception otherwise
         # Google mostly sends 'application/json' in the Content-Type header,
         # but occasionally it sends 'application/javascript
@@ -151,10 +172,12 @@ class TrendReq(object):
             # trim initial characters
             # some responses start with garbage characters, like ")]}',"
             # these have to be cleaned before being passed to the json parser
-            content = response.text[trim_chars:]
+            # the prefix is ascii, so it is skipped on the raw bytes without copying them
+            content = memoryview(response.content)[trim_chars:]
             # parse json
-            self.GetNewProxy()
-            return json.loads(content)
+            with self._proxy_lock:
+                self.GetNewProxy()
+            return self.decoder(content)
         else:
             if response.status_code == status_codes.codes.too_many_requests:
                 raise exceptions.TooManyRequestsError.from_response(response)
@@ -167,41 +190,50 @@ class TrendReq(object):
             raise ValueError('gprop must be empty (to indicate web), images, news, youtube, or froogle')
         self.kw_list = kw_list
         self.geo = geo or self.geo
-        self.token_payload = {
+        if not isinstance(self.geo, list):
+            self.geo = [self.geo]
+        self.token_payload = self._token_payload(self.kw_list, cat, timeframe,
+                                                 self.geo, gprop)
+        # get tokens
+        self._tokens()
+        return
+
+    def _token_payload(self, kw_list, cat, timeframe, geo_list, gprop):
+        """Return the explore payload for every combination of keyword and geo"""
+        token_payload = {
             'hl': self.hl,
             'tz': self.tz,
             'req': {'comparisonItem': [], 'category': cat, 'property': gprop}
         }
 
-        if not isinstance(self.geo, list):
-            self.geo = [self.geo]
-
         # Check if timeframe is a list
         if isinstance(timeframe, list):
-            for index, (kw, geo) in enumerate(product(self.kw_list, self.geo)):
+            for index, (kw, geo) in enumerate(product(kw_list, geo_list)):
                 keyword_payload = {'keyword': kw, 'time': timeframe[index], 'geo': geo}
-                self.token_payload['req']['comparisonItem'].append(keyword_payload)
+                token_payload['req']['comparisonItem'].append(keyword_payload)
         else:
             # build out json for each keyword with
-            for kw, geo in product(self.kw_list, self.geo):
+            for kw, geo in product(kw_list, geo_list):
                 keyword_payload = {'keyword': kw, 'time': timeframe, 'geo': geo}
-                self.token_payload['req']['comparisonItem'].append(keyword_payload)
+                token_payload['req']['comparisonItem'].append(keyword_payload)
 
         # requests will mangle this if it is not a string
-        self.token_payload['req'] = json.dumps(self.token_payload['req'])
-        # get tokens
-        self._tokens()
-        return
+        token_payload['req'] = json.dumps(token_payload['req'])
+        return token_payload
 
-    def _tokens(self):
-        """Makes request to Google to get API tokens for interest over time, interest by region and related queries"""
-        # make the request and parse the returned json
-        widget_dicts = self._get_data(
+    def _explore_widgets(self, token_payload):
+        """Makes request to Google to get the widgets, and their API tokens, of an explore payload"""
+        return self._get_data(
             url=TrendReq.GENERAL_URL,
             method=TrendReq.POST_METHOD,
-            params=self.token_payload,
+            params=token_payload,
             trim_chars=4,
         )['widgets']
+
+    def _tokens(self):
+        """Makes request to Google to get API tokens for interest over time, interest by region and related queries"""
+        # make the request and parse the returned json
+        widget_dicts = self._explore_widgets(self.token_payload)
         # order of the json matters...
         first_region_token = True
         # clear self.related_queries_widget_list and self.related_topics_widget_list
@@ -325,26 +357,26 @@ class TrendReq(object):
         return result_df
 
 
-    def interest_by_region(self, resolution='COUNTRY', inc_low_vol=False,
-                           inc_geo_code=False):
-        """Request data from Google's Interest by Region section and return a dataframe"""
+    @staticmethod
+    def _set_resolution(widget_request, geo, resolution):
+        """Set the resolution of a GEO_MAP widget request when Google supports it for geo
 
-        # make the request
+        Returns False, leaving Google's default resolution in place, when it does not
+        """
+        # worldwide supports every resolution, countries support REGION and CITY
+        # and only the US has DMAs
+        if geo == '' or resolution in ['CITY', 'REGION'] or \
+                (geo.startswith('US') and resolution == 'DMA'):
+            widget_request['resolution'] = resolution
+            return True
+        return False
+
+    def _region_data(self, widget_request, token):
+        """Request the geoMapData of a GEO_MAP widget"""
         region_payload = dict()
-        if self.geo == '':
-            self.interest_by_region_widget['request'][
-                'resolution'] = resolution
-        elif self.geo == 'US' and resolution in ['DMA', 'CITY', 'REGION']:
-            self.interest_by_region_widget['request'][
-                'resolution'] = resolution
-
-        self.interest_by_region_widget['request'][
-            'includeLowSearchVolumeGeos'] = inc_low_vol
-
         # convert to string as requests will mangle
-        region_payload['req'] = json.dumps(
-            self.interest_by_region_widget['request'])
-        region_payload['token'] = self.interest_by_region_widget['token']
+        region_payload['req'] = json.dumps(widget_request)
+        region_payload['token'] = token
         region_payload['tz'] = self.tz
 
         # parse returned json
@@ -354,7 +386,24 @@ class TrendReq(object):
             trim_chars=5,
             params=region_payload,
         )
-        df = pd.DataFrame(req_json['default']['geoMapData'])
+        return req_json['default']['geoMapData']
+
+    def interest_by_region(self, resolution='COUNTRY', inc_low_vol=False,
+                           inc_geo_code=False):
+        """Request data from Google's Interest by Region section and return a dataframe"""
+
+        # make the request
+        # build_payload always turns self.geo into a list
+        geo_list = self.geo if isinstance(self.geo, list) else [self.geo]
+        if len(geo_list) == 1:
+            self._set_resolution(self.interest_by_region_widget['request'],
+                                 geo_list[0], resolution)
+
+        self.interest_by_region_widget['request'][
+            'includeLowSearchVolumeGeos'] = inc_low_vol
+
+        df = pd.DataFrame(self._region_data(self.interest_by_region_widget['request'],
+                                            self.interest_by_region_widget['token']))
         if (df.empty):
             return df
 
@@ -378,6 +427,122 @@ class TrendReq(object):
 
         return result_df
 
+    def interest_by_region_sweep(self, kw_list, geos, resolutions=('REGION',), cat=0,
+                                 timeframe='today 5-y', gprop='', inc_low_vol=False,
+                                 max_workers=8, rate_limit=None):
+        """Request Interest by Region for every geo and resolution and return one long-format dataframe
+
+        The explore tokens of all geos are resolved concurrently, once per geo, and shared by
+        every resolution, then all the geo maps are fetched concurrently. The state set by
+        build_payload is left untouched. Geos without a geo map (e.g. too little search volume)
+        and resolutions a geo does not support (e.g. DMA outside of the US, COUNTRY inside
+        a country) are skipped with a message, and so are the geos and resolutions whose
+        request failed (e.g. a 429 once the quota is reached), keeping the others' rows.
+
+        :param kw_list: the keywords to compare, at most 5
+        :param geos: the geos to sweep, '' is worldwide
+        :param resolutions: the resolutions requested for every geo
+        :param max_workers: how many requests may be in flight at once
+        :param rate_limit: the maximum number of requests per second, unlimited if None
+        :return: a dataframe indexed by (geo, subregion) with the columns resolution,
+            geoCode, keyword and value
+        """
+        if gprop not in ['', 'images', 'news', 'youtube', 'froogle']:
+            raise ValueError('gprop must be empty (to indicate web), images, news, youtube, or froogle')
+        kw_list = list(kw_list)
+        geos = list(dict.fromkeys(geos))
+        limiter = RateLimiter(rate_limit)
+
+        # a failed request, or a payload that is not what we expected, only skips its geo map
+        request_errors = (exceptions.ResponseError, KeyError, ValueError) + TRANSPORT_ERRORS
+
+        def limited(func, *args):
+            limiter.wait()
+            return func(*args)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # one explore request per geo
+            explores = {geo: executor.submit(
+                limited, self._explore_widgets,
+                self._token_payload(kw_list, cat, timeframe, [geo], gprop)) for geo in geos}
+            region_widgets = dict()
+            for geo, future in explores.items():
+                try:
+                    widget_dicts = future.result()
+                except request_errors as e:
+                    print(f'Could not explore {geo or "worldwide"} ({e}); Skipping')
+                    continue
+                widget = next((w for w in widget_dicts if w['id'] == 'GEO_MAP'), None)
+                if widget is None:
+                    print(f'No interest by region for {geo or "worldwide"}; Skipping')
+                    continue
+                region_widgets[geo] = widget
+
+            # one geo map request per geo and resolution
+            futures = dict()
+            for geo, resolution in product(region_widgets, resolutions):
+                widget = region_widgets[geo]
+                widget_request = copy.deepcopy(widget['request'])
+                if not self._set_resolution(widget_request, geo, resolution):
+                    print(f'Resolution {resolution} is not available for {geo}; Skipping')
+                    continue
+                widget_request['includeLowSearchVolumeGeos'] = inc_low_vol
+                # label the rows with the resolution that is actually sent
+                futures[(geo, widget_request['resolution'])] = executor.submit(
+                    limited, self._region_data, widget_request, widget['token'])
+
+            rows = list()
+            for (geo, resolution), future in futures.items():
+                try:
+                    regions = future.result()
+                except request_errors as e:
+                    print(f'Could not get {resolution} interest by region for {geo or "worldwide"} '
+                          f'({e}); Skipping')
+                    continue
+                for region in regions:
+                    for idx, kw in enumerate(kw_list):
+                        rows.append({
+                            'geo': geo,
+                            'subregion': region['geoName'],
+                            'resolution': resolution,
+                            'geoCode': region.get('geoCode'),
+                            'keyword': kw,
+                            'value': int(region['value'][idx]),
+                        })
+
+        columns = ['geo', 'subregion', 'resolution', 'geoCode', 'keyword', 'value']
+        return pd.DataFrame(rows, columns=columns).set_index(['geo', 'subregion'])
+
+    def _fan_out(self, func, items):
+        """Call func on every item and return the results in order, from max_workers threads"""
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
+
+    def _related_data(self, request_json):
+        """Request the data of a related topics or related queries widget and return (keyword, json)"""
+        # ensure we know which keyword we are looking at rather than relying on order
+        try:
+            kw = request_json['request']['restriction'][
+                'complexKeywordsRestriction']['keyword'][0]['value']
+        except KeyError:
+            kw = ''
+        related_payload = dict()
+        # convert to string as requests will mangle
+        related_payload['req'] = json.dumps(request_json['request'])
+        related_payload['token'] = request_json['token']
+        related_payload['tz'] = self.tz
+
+        # parse the returned json
+        req_json = self._get_data(
+            url=TrendReq.RELATED_QUERIES_URL,
+            method=TrendReq.GET_METHOD,
+            trim_chars=5,
+            params=related_payload,
+        )
+        return kw, req_json
+
     def related_topics(self):
         """Request data from Google's Related Topics section and return a dictionary of dataframes
 
@@ -385,28 +550,8 @@ class TrendReq(object):
         """
 
         # make the request
-        related_payload = dict()
         result_dict = dict()
-        for request_json in self.related_topics_widget_list:
-            # ensure we know which keyword we are looking at rather than relying on order
-            try:
-                kw = request_json['request']['restriction'][
-                    'complexKeywordsRestriction']['keyword'][0]['value']
-            except KeyError:
-                kw = ''
-            # convert to string as requests will mangle
-            related_payload['req'] = json.dumps(request_json['request'])
-            related_payload['token'] = request_json['token']
-            related_payload['tz'] = self.tz
-
-            # parse the returned json
-            req_json = self._get_data(
-                url=TrendReq.RELATED_QUERIES_URL,
-                method=TrendReq.GET_METHOD,
-                trim_chars=5,
-                params=related_payload,
-            )
-
+        for kw, req_json in self._fan_out(self._related_data, self.related_topics_widget_list):
             # top topics
             try:
                 top_list = req_json['default']['rankedList'][0]['rankedKeyword']
@@ -433,28 +578,8 @@ class TrendReq(object):
         """
 
         # make the request
-        related_payload = dict()
         result_dict = dict()
-        for request_json in self.related_queries_widget_list:
-            # ensure we know which keyword we are looking at rather than relying on order
-            try:
-                kw = request_json['request']['restriction'][
-                    'complexKeywordsRestriction']['keyword'][0]['value']
-            except KeyError:
-                kw = ''
-            # convert to string as requests will mangle
-            related_payload['req'] = json.dumps(request_json['request'])
-            related_payload['token'] = request_json['token']
-            related_payload['tz'] = self.tz
-
-            # parse the returned json
-            req_json = self._get_data(
-                url=TrendReq.RELATED_QUERIES_URL,
-                method=TrendReq.GET_METHOD,
-                trim_chars=5,
-                params=related_payload,
-            )
-
+        for kw, req_json in self._fan_out(self._related_data, self.related_queries_widget_list):
             # top queries
             try:
                 top_df = pd.DataFrame(
@@ -497,7 +622,6 @@ class TrendReq(object):
             method=TrendReq.GET_METHOD,
             trim_chars=5,
             params=forms,
-            **self.requests_args
         )['default']['trendingSearchesDays'][0]['trendingSearches']
         # parse the returned json
         result_df = pd.DataFrame(trend['title'] for trend in req_json)
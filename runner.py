@@ -0,0 +1,200 @@
+from itertools import product
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+from time import sleep
+
+import pandas as pd
+
+from pytrends.request import TrendReq
+
+
+def make_tasks(keywords, geos=('',), timeframes=('today 5-y',), chunk_size=5):
+    """Split a workload into (kw_list, geo, timeframe) tasks
+
+    Google compares at most 5 keywords in one payload, so the keywords are
+    chunked into groups of chunk_size before being combined with every geo and timeframe.
+    """
+    keywords = list(keywords)
+    chunks = [tuple(keywords[i:i + chunk_size]) for i in range(0, len(keywords), chunk_size)]
+    return [(kw_list, geo, timeframe) for kw_list, geo, timeframe in product(chunks, geos, timeframes)]
+
+
+def _worker(index, proxies, hl, tz, cat, gprop, wait_time, task_queue, result_queue, out_dir,
+            current):
+    """Process a shard of tasks with a TrendReq of its own until a None task is received
+
+    Every message sent back starts with its kind: 'failed' if the TrendReq could not be
+    created and 'done' once a task has a result or an error. The task being worked on is
+    written to current[2 * index:2 * index + 2] so that the coordinator still knows it
+    if the process dies before reporting it.
+    """
+    # every worker gets its own TrendReq, so its own proxies and cookie
+    try:
+        pytrends = TrendReq(hl=hl, tz=tz, proxies=proxies)
+    except Exception as e:
+        result_queue.put(('failed', index, None, None, None, str(e)))
+        return
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, (kw_list, geo, timeframe), attempt = task
+        current[2 * index] = task_id
+        current[2 * index + 1] = attempt
+        try:
+            pytrends.build_payload(list(kw_list), cat=cat, timeframe=timeframe,
+                                   geo=geo, gprop=gprop)
+            df = pytrends.interest_over_time()
+            # results go through files so that big dataframes don't clog the queue
+            path = os.path.join(out_dir, f'{task_id}.pkl')
+            df.to_pickle(path)
+            result_queue.put(('done', index, task_id, attempt, path, None))
+        except Exception as e:
+            result_queue.put(('done', index, task_id, attempt, None, str(e)))
+        # the task is reported, dying from now on must not be blamed on it
+        current[2 * index] = -1
+        sleep(wait_time)  # don't go too fast or Google will send 429s
+
+
+class ShardedRunner(object):
+    """
+    Runs interest over time requests in a pool of processes
+
+    Tasks are pulled from one shared queue, so a worker that finishes early simply takes the
+    next pending task instead of waiting on a fixed share of the workload. Each worker uses
+    its own subset of the proxies and its own cookie, and writes its results to out_dir.
+    """
+
+    def __init__(self, processes=None, proxies=(), hl='en-US', tz=360, cat=0, gprop='',
+                 wait_time=5.0, max_attempts=3, out_dir=None, verbose=True):
+        """
+        :param processes: the number of worker processes (defaults to the number of proxies or cpus)
+        :param proxies: the proxies to split between the workers
+        :param hl: the language passed to every TrendReq
+        :param tz: the timezone offset passed to every TrendReq
+        :param cat: the category passed to every build_payload
+        :param gprop: the property passed to every build_payload
+        :param wait_time: seconds a worker waits between two tasks
+        :param max_attempts: how many times a failing task is tried before giving up
+        :param out_dir: the directory results are written to (a temporary directory,
+            removed once the run is over, if None)
+        :param verbose: if True, prints the progress of the run
+        """
+        self.proxies = list(proxies)
+        self.processes = processes or len(self.proxies) or os.cpu_count() or 1
+        self.hl = hl
+        self.tz = tz
+        self.cat = cat
+        self.gprop = gprop
+        self.wait_time = wait_time
+        self.max_attempts = max_attempts
+        self.out_dir = out_dir
+        self.verbose = verbose
+        self.errors = dict()
+
+    def _shard_proxies(self, index, processes):
+        """Return the proxies of the index-th of processes workers"""
+        if not self.proxies:
+            return ''
+        return self.proxies[index::processes] or [self.proxies[index % len(self.proxies)]]
+
+    def run(self, tasks):
+        """Run the tasks and return a dictionary of (kw_list, geo, timeframe) -> dataframe
+
+        Tasks that still fail after max_attempts are left out of the result and their last
+        error is kept in self.errors
+        """
+        tasks = list(tasks)
+        out_dir = self.out_dir or tempfile.mkdtemp(prefix='pytrends_')
+        os.makedirs(out_dir, exist_ok=True)
+        task_queue = mp.Queue()
+        # SimpleQueue.put writes to the pipe before returning, unlike Queue.put which leaves
+        # it to a thread that dies with the process, so a reported task is never lost
+        result_queue = mp.SimpleQueue()
+        for task_id, task in enumerate(tasks):
+            task_queue.put((task_id, task, 1))
+
+        processes = min(self.processes, len(tasks))
+        # the task each worker is working on, as (task_id, attempt), -1 while idle
+        current = mp.Array('l', [-1] * (2 * processes))
+        workers = list()
+        for index in range(processes):
+            worker = mp.Process(
+                target=_worker,
+                args=(index, self._shard_proxies(index, processes), self.hl, self.tz,
+                      self.cat, self.gprop, self.wait_time, task_queue, result_queue,
+                      out_dir, current),
+                daemon=True,
+            )
+            worker.start()
+            workers.append(worker)
+
+        results = dict()
+        self.errors = dict()
+        pending = len(tasks)
+        lost = set()
+        # (task_id, attempt) pairs already accounted for, a late report of a lost task is ignored
+        finished = set()
+
+        def resolve(index, task_id, attempt, path, error):
+            nonlocal pending
+            if (task_id, attempt) in finished:
+                return
+            finished.add((task_id, attempt))
+            task = tasks[task_id]
+            if error is not None and attempt < self.max_attempts:
+                if self.verbose:
+                    print(f'worker {index} failed {task} ({error}), retrying')
+                task_queue.put((task_id, task, attempt + 1))
+                return
+            pending -= 1
+            if error is not None:
+                self.errors[task] = error
+            else:
+                results[task] = pd.read_pickle(path)
+                os.remove(path)
+            if self.verbose:
+                print(f'{len(tasks) - pending}/{len(tasks)} done, '
+                      f'{len(self.errors)} failed (worker {index}: {task})')
+
+        def handle(message):
+            kind, index, task_id, attempt, path, error = message
+            if kind == 'failed':
+                print(f'worker {index} could not start: {error}')
+            else:
+                resolve(index, task_id, attempt, path, error)
+
+        try:
+            while pending:
+                dead = [index for index, worker in enumerate(workers)
+                        if index not in lost and not worker.is_alive()]
+                # whatever the dead workers reported before exiting is queued by now,
+                # so drain the queue before assuming their current task was lost
+                received = False
+                while not result_queue.empty():
+                    handle(result_queue.get())
+                    received = True
+                # a worker that died mid-task never reports back, retry or fail its task
+                for index in dead:
+                    lost.add(index)
+                    task_id, attempt = current[2 * index], current[2 * index + 1]
+                    if task_id >= 0:
+                        # ignored by resolve if the worker reported it before dying
+                        resolve(index, task_id, attempt, None,
+                                f'worker exited with code {workers[index].exitcode}')
+                if pending and len(lost) == len(workers):
+                    raise RuntimeError('All workers exited with tasks still pending')
+                if not received:
+                    sleep(0.1)
+        finally:
+            for _ in workers:
+                task_queue.put(None)
+            for worker in workers:
+                worker.join(timeout=self.wait_time + 10)
+                if worker.is_alive():
+                    worker.terminate()
+            if self.out_dir is None:
+                shutil.rmtree(out_dir, ignore_errors=True)
+        return results
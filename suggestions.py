@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _TrieNode(object):
+    __slots__ = ('children', 'keys')
+
+    def __init__(self):
+        self.children = dict()
+        self.keys = set()
+
+
+class SuggestionIndex(object):
+    """
+    Persistent local store for Google's Keyword Suggestion dropdown
+
+    Every `topics` list returned by TrendReq.suggestions is saved to a JSON
+    file and indexed in a prefix trie, so repeated keywords are answered
+    without a request and cached topics can be looked up by prefix.
+
+    With prefix_hits, a keyword that was never fetched but is the prefix of a
+    cached keyword or topic title is answered from the trie too, with the cached
+    topics prefix() returns, rather than with Google's own suggestions for it.
+    Without it, suggestions() only answers exact repeats and prefix() is the
+    only lookup that uses the trie.
+
+    New entries are written to disk at most every save_interval seconds, after
+    suggestions_many and on close(); call save() to write them right away.
+    """
+
+    def __init__(self, pytrends, path='suggestions_cache.json', ttl=7 * 24 * 3600,
+                 max_workers=8, save_interval=60, prefix_hits=True):
+        """
+        :param pytrends: the TrendReq instance used to fetch cache misses
+        :param path: the JSON file the suggestions are persisted to (None keeps them in memory)
+        :param ttl: seconds after which a cached entry is refreshed in the background
+        :param max_workers: how many requests may be in flight at once
+        :param save_interval: the minimum number of seconds between two automatic saves
+        :param prefix_hits: answer keywords covered by the cached ones from the trie
+        """
+        self.pytrends = pytrends
+        self.path = path
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.save_interval = save_interval
+        self.prefix_hits = prefix_hits
+        self.entries = dict()
+        self._root = _TrieNode()
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._refreshing = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._load()
+
+    @staticmethod
+    def _normalize(text):
+        return ' '.join(text.lower().split())
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            self.entries = json.load(file)
+        for key, entry in self.entries.items():
+            self._index(key, entry['topics'])
+
+    def save(self):
+        """Write the cached suggestions to disk if they changed since the last save"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+                entries = dict(self.entries)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            # serialize outside of _lock so lookups are not blocked while writing
+            # write to a temporary file first so a crash never leaves a truncated cache
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(entries, file)
+            os.replace(tmp_path, self.path)
+
+    def _maybe_save(self):
+        if self._dirty and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def _insert(self, text, key):
+        node = self._root
+        node.keys.add(key)
+        for char in text:
+            node = node.children.setdefault(char, _TrieNode())
+            node.keys.add(key)
+
+    def _index(self, key, topics):
+        # index the keyword itself as well as the titles of the topics it returned
+        self._insert(key, key)
+        for topic in topics:
+            title = topic.get('title')
+            if title:
+                self._insert(self._normalize(title), key)
+
+    def _store(self, key, topics):
+        with self._lock:
+            self.entries[key] = {'fetched': time.time(), 'topics': topics}
+            self._index(key, topics)
+            self._dirty = True
+
+    def _fetch(self, keyword):
+        topics = self.pytrends.suggestions(keyword)
+        self._store(self._normalize(keyword), topics)
+        return topics
+
+    def _refresh(self, keyword):
+        key = self._normalize(keyword)
+        try:
+            self._fetch(keyword)
+            self._maybe_save()
+        except Exception as e:
+            # a failed refresh keeps serving the stale entry
+            print(f'Could not refresh suggestions for {keyword}: {e}')
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _is_stale(self, entry):
+        return self.ttl is not None and time.time() - entry['fetched'] > self.ttl
+
+    def cached(self, keyword):
+        """Return the cached topics for a keyword, or None if it was never fetched
+
+        Stale entries are still returned, and a background refresh is scheduled for them
+        """
+        key = self._normalize(keyword)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if self._is_stale(entry) and key not in self._refreshing:
+                self._refreshing.add(key)
+                self._executor.submit(self._refresh, keyword)
+        return entry['topics']
+
+    def _lookup(self, keyword):
+        """Return the cached or, with prefix_hits, the prefix-covered topics of a keyword, or None"""
+        topics = self.cached(keyword)
+        if topics is None and self.prefix_hits and self._normalize(keyword):
+            topics = self.prefix(keyword) or None
+        return topics
+
+    def suggestions(self, keyword):
+        """Return the topics for a keyword from the cache, fetching them from Google on a miss
+
+        With prefix_hits, a keyword covered by the trie is not a miss, see the class docstring
+        """
+        topics = self._lookup(keyword)
+        if topics is None:
+            topics = self._fetch(keyword)
+            self._maybe_save()
+        return topics
+
+    def suggestions_many(self, keywords):
+        """Return a dictionary of keyword -> topics, fetching only the cache misses concurrently
+
+        Keywords spelled the same once normalized are fetched once
+        """
+        result = dict()
+        misses = list()
+        for keyword in keywords:
+            topics = self._lookup(keyword)
+            if topics is None:
+                misses.append(keyword)
+            else:
+                result[keyword] = topics
+        # the same keyword may be listed more than once, or spelled differently,
+        # fetch every normalized keyword only once
+        to_fetch = dict()
+        for keyword in misses:
+            to_fetch.setdefault(self._normalize(keyword), keyword)
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetched = dict(zip(to_fetch, executor.map(self._fetch, to_fetch.values())))
+            for keyword in misses:
+                result[keyword] = fetched[self._normalize(keyword)]
+            self.save()
+        return {keyword: result[keyword] for keyword in keywords}
+
+    def prefix(self, text):
+        """Return the cached topics whose title, or the keyword they were fetched for, starts with text
+
+        This only looks at the local store and never sends a request
+        """
+        text = self._normalize(text)
+        with self._lock:
+            node = self._root
+            for char in text:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            keys = sorted(node.keys)
+            topics = list()
+            seen = set()
+            for key in keys:
+                for topic in self.entries[key]['topics']:
+                    title = self._normalize(topic.get('title', ''))
+                    topic_id = topic.get('mid') or title
+                    if topic_id in seen or not (title.startswith(text) or key.startswith(text)):
+                        continue
+                    seen.add(topic_id)
+                    topics.append(topic)
+        return topics
+
+    def close(self):
+        """Wait for pending background refreshes, release the worker threads and save the cache"""
+        self._executor.shutdown(wait=True)
+        self.save()
@@ -0,0 +1,116 @@
+"""Local HTTP/2 (h2c, prior knowledge) stub server for the transport tests and benchmarks"""
+import gzip
+import socket
+import threading
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+
+
+def route(path):
+    """Return the last segment of a request path, without its query string"""
+    return path.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+
+
+class H2StubServer(object):
+    """
+    Answers every request with a gzip-compressed body, after `delay` seconds
+
+    body is either the bytes sent for every request or a dictionary mapping the last
+    segment of a request's path (e.g. 'multiline' for /trends/api/widgetdata/multiline)
+    to the bytes sent for it, where the '' entry, if any, answers every other path.
+
+    Counts the connections it accepted and the highest number of streams that were
+    waiting for an answer at the same time on one connection.
+    """
+
+    def __init__(self, body, delay=0.0, content_type='application/json; charset=UTF-8'):
+        if isinstance(body, bytes):
+            body = {'': body}
+        self.bodies = {name: gzip.compress(data) for name, data in body.items()}
+        self.delay = delay
+        self.content_type = content_type
+        self.connections = 0
+        self.requests = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(64)
+        self.url = f'http://127.0.0.1:{self._sock.getsockname()[1]}'
+        self._closed = False
+
+    def __enter__(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closed = True
+        self._sock.close()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        h2conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        h2conn.initiate_connection()
+        write_lock = threading.Lock()
+        in_flight = set()
+
+        def flush():
+            data = h2conn.data_to_send()
+            if data:
+                conn.sendall(data)
+
+        paths = dict()
+
+        def respond(stream_id):
+            time.sleep(self.delay)
+            body = self.bodies.get(route(paths.pop(stream_id)), self.bodies.get(''))
+            with write_lock:
+                in_flight.discard(stream_id)
+                if body is None:
+                    h2conn.send_headers(stream_id, [(':status', '404')], end_stream=True)
+                else:
+                    h2conn.send_headers(stream_id, [
+                        (':status', '200'),
+                        ('content-type', self.content_type),
+                        ('content-encoding', 'gzip'),
+                        ('content-length', str(len(body))),
+                    ])
+                    h2conn.send_data(stream_id, body, end_stream=True)
+                flush()
+
+        with write_lock:
+            flush()
+        while True:
+            try:
+                data = conn.recv(65535)
+            except OSError:
+                break
+            if not data:
+                break
+            with write_lock:
+                events = h2conn.receive_data(data)
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        paths[event.stream_id] = dict(event.headers)[b':path'].decode()
+                    if isinstance(event, h2.events.StreamEnded):
+                        in_flight.add(event.stream_id)
+                        with self._lock:
+                            self.requests += 1
+                            self.max_in_flight = max(self.max_in_flight, len(in_flight))
+                        threading.Thread(target=respond, args=(event.stream_id,),
+                                         daemon=True).start()
+                flush()
+        conn.close()
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from pytrends.changes import ChangeDetector, JsonDigestStore, make_key
+
+
+class CountingStore(object):
+    def __init__(self):
+        self.digests = dict()
+        self.lookups = list()
+
+    def get_many(self, keys):
+        self.lookups.append(len(keys))
+        return {key: self.digests[key] for key in keys if key in self.digests}
+
+    def save(self, digests):
+        self.digests.update(digests)
+
+
+def test_unchanged_window_is_dropped_after_save(tmp_path):
+    df = pd.DataFrame({'AI': [1, 2, 3]}, index=pd.date_range('2024-01-01', periods=3))
+    key = make_key('pytrends', 'AI', 'US', 'now 7-d')
+    detector = ChangeDetector(JsonDigestStore(str(tmp_path / 'digests.json')))
+    assert detector.changed(key, df)
+    detector.save()
+
+    detector = ChangeDetector(JsonDigestStore(str(tmp_path / 'digests.json')))
+    assert not detector.changed(key, df)
+    assert detector.changed(key, df.assign(AI=[1, 2, 4]))
+
+
+def test_unsaved_digests_are_checked_again():
+    store = CountingStore()
+    key = make_key('pytrends', 'AI')
+    assert ChangeDetector(store).changed(key, [1])
+    # the first detector never saved, the write is assumed to have failed
+    assert ChangeDetector(store).changed(key, [1])
+
+
+def test_changed_records_looks_up_only_the_current_batch():
+    store = CountingStore()
+    records = [{'id': i, 'title': f'title {i}'} for i in range(25)]
+    detector = ChangeDetector(store, batch_size=10)
+    assert list(detector.changed_records('api', records)) == records
+    detector.save()
+    assert store.lookups == [10, 10, 5]
+
+    records[3] = {'id': 3, 'title': 'edited'}
+    detector = ChangeDetector(store, batch_size=10)
+    assert list(detector.changed_records('api', records)) == [records[3]]
@@ -0,0 +1,21 @@
+import json
+
+import pytest
+
+from pytrends import decoders
+
+BODY = memoryview(b")]}',\n" + json.dumps({'default': {'topics': ['café']}}).encode('utf-8'))[5:]
+
+
+def test_builtin_decoders_parse_a_memoryview():
+    assert decoders.get_decoder('json')(BODY) == {'default': {'topics': ['café']}}
+    assert decoders.get_decoder()(BODY) == {'default': {'topics': ['café']}}
+
+
+def test_custom_callable_receives_bytes():
+    assert decoders.get_decoder(json.loads)(BODY) == {'default': {'topics': ['café']}}
+
+
+def test_unknown_decoder_name():
+    with pytest.raises(ValueError):
+        decoders.get_decoder('yaml')
@@ -0,0 +1,59 @@
+import pytest
+
+from pytrends.ingest import Ingestor, Source
+
+RECORDS = [{'id': i, 'title': f'title {i}'} for i in range(23)]
+
+
+class FakeResponse(object):
+    def __init__(self, payload, links=None):
+        self.payload = payload
+        self.links = links or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class CappedPageSession(object):
+    """Serves RECORDS by page or offset, never more than cap records per page"""
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def get(self, url, params=None, timeout=None):
+        size = min(params['limit'], self.cap)
+        start = params['offset'] if 'offset' in params else (params['page'] - 1) * size
+        return FakeResponse({'data': RECORDS[start:start + size]})
+
+
+class CursorSession(object):
+    def get(self, url, params=None, timeout=None):
+        start = int(params.get('cursor', 0))
+        payload = {'data': RECORDS[start:start + 10]}
+        if start + 10 < len(RECORDS):
+            # the last page has no next cursor at all
+            payload['meta'] = {'next': str(start + 10)}
+        return FakeResponse(payload)
+
+
+@pytest.mark.parametrize('pagination', ['page', 'offset'])
+@pytest.mark.parametrize('cap', [5, 10, 100])
+def test_numbered_pages_follow_the_served_page_size(pagination, cap):
+    source = Source('fake', 'https://api.example.com', 'api_data.fake', ('id', 'title'),
+                    pagination=pagination, record_path=('data',), page_size=10)
+    ingestor = Ingestor(max_workers=3, session=CappedPageSession(cap))
+    assert list(ingestor.records(source)) == RECORDS
+
+
+def test_cursor_pages_stop_without_next_cursor():
+    source = Source('fake', 'https://api.example.com', 'api_data.fake', ('id', 'title'),
+                    pagination='cursor', record_path=('data',), cursor_path=('meta', 'next'))
+    assert list(Ingestor(session=CursorSession()).records(source)) == RECORDS
+
+
+def test_cursor_pagination_needs_cursor_path():
+    with pytest.raises(ValueError):
+        Source('fake', 'https://api.example.com', 'api_data.fake', ('id',), pagination='cursor')
@@ -0,0 +1,66 @@
+import pandas as pd
+
+from pytrends.exceptions import ResponseError
+from pytrends.realtime import TrendingPoller
+
+
+class FakeTrendReq(object):
+    def __init__(self):
+        self.stories = dict()
+        self.today = list()
+
+    def realtime_trending_searches(self, pn='US', cat='all', count=300):
+        stories = self.stories[pn]
+        if isinstance(stories, Exception):
+            raise stories
+        return pd.DataFrame(stories)
+
+    def today_searches(self, pn='US'):
+        if not self.today:
+            # what today_searches raises when Google sends no trending searches
+            raise IndexError('list index out of range')
+        return pd.Series(self.today)
+
+
+def test_stories_are_new_then_changed_then_unchanged():
+    client = FakeTrendReq()
+    poller = TrendingPoller(client)
+    client.stories['US'] = [{'title': 'Storm', 'entityNames': ['Rain']}]
+    assert poller.poll_once()['status'].tolist() == ['new']
+
+    client.stories['US'] = [{'title': 'Storm', 'entityNames': ['Rain', 'Wind']}]
+    assert poller.poll_once()['status'].tolist() == ['changed']
+    assert poller.poll_once().empty
+
+
+def test_missing_entity_names_are_treated_as_empty():
+    client = FakeTrendReq()
+    poller = TrendingPoller(client)
+    # the second story has no entityNames, so its cell is NaN
+    client.stories['US'] = [{'title': 'Storm', 'entityNames': ['Rain']}, {'title': 'Quake'}]
+    changes = poller.poll_once()
+    assert changes['title'].tolist() == ['Storm', 'Quake']
+    assert changes['entityNames'].tolist() == [['Rain'], []]
+    assert poller.poll_once().empty
+
+
+def test_seen_stories_are_evicted_oldest_first():
+    client = FakeTrendReq()
+    poller = TrendingPoller(client, max_seen=2)
+    client.stories['US'] = [{'title': 'A', 'entityNames': []}, {'title': 'B', 'entityNames': []}]
+    poller.poll_once()
+    client.stories['US'] = [{'title': 'C', 'entityNames': []}]
+    poller.poll_once()
+    assert [key[3] for key in poller.seen] == ['B', 'C']
+
+    client.stories['US'] = [{'title': 'A', 'entityNames': []}]
+    assert poller.poll_once()['status'].tolist() == ['new']
+
+
+def test_failing_feeds_are_skipped():
+    client = FakeTrendReq()
+    poller = TrendingPoller(client, pns=('US', 'GB'), today=True)
+    client.stories['US'] = ResponseError('The request failed', response=None)
+    client.stories['GB'] = [{'title': 'Match', 'entityNames': []}]
+    changes = poller.poll_once()
+    assert changes[['pn', 'title']].values.tolist() == [['GB', 'Match']]
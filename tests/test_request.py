@@ -0,0 +1,58 @@
+import json
+
+from pytrends.request import TrendReq
+
+BODY = b")]}',\n" + json.dumps({'default': {'topics': []}}).encode('utf-8')
+
+
+class FakeResponse(object):
+    status_code = 200
+    headers = {'Content-Type': 'application/json; charset=UTF-8'}
+    content = BODY
+    cookies = {'NID': 'from-transport', '1P_JAR': 'other'}
+
+
+class RecordingTransport(object):
+    rotates_proxies = True
+
+    def __init__(self):
+        self.calls = list()
+
+    def check_args(self, requests_args):
+        pass
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(dict(kwargs, url=url))
+        return FakeResponse()
+
+
+def test_requests_args_proxies_are_passed_once(monkeypatch):
+    monkeypatch.setattr(TrendReq, 'GetGoogleCookie', lambda self: {'NID': 'abc'})
+    transport = RecordingTransport()
+    pytrends = TrendReq(transport=transport,
+                        requests_args={'proxies': {'http': 'http://proxy:8080'}, 'verify': False})
+    assert pytrends.suggestions('python') == []
+    assert transport.calls[0]['proxies'] == {'http': 'http://proxy:8080'}
+    assert transport.calls[0]['verify'] is False
+    assert transport.calls[0]['cookies'] == {'NID': 'abc'}
+
+
+def test_rotating_proxy_is_merged_into_requests_args_proxies(monkeypatch):
+    monkeypatch.setattr(TrendReq, 'GetGoogleCookie', lambda self: {'NID': 'abc'})
+    transport = RecordingTransport()
+    pytrends = TrendReq(transport=transport, proxies=['https://rotating:1', 'https://rotating:2'],
+                        requests_args={'proxies': {'http': 'http://proxy:8080'}})
+    pytrends.suggestions('python')
+    pytrends.suggestions('python')
+    assert [call['proxies'] for call in transport.calls] == [
+        {'http': 'http://proxy:8080', 'https': 'https://rotating:1'},
+        {'http': 'http://proxy:8080', 'https': 'https://rotating:2'},
+    ]
+
+
+def test_cookie_is_fetched_through_the_transport():
+    transport = RecordingTransport()
+    pytrends = TrendReq(transport=transport, proxies=['https://rotating:1'])
+    assert pytrends.cookies == {'NID': 'from-transport'}
+    assert transport.calls[0]['url'].endswith('/explore/?geo=US')
+    assert transport.calls[0]['proxies'] == {'https': 'https://rotating:1'}
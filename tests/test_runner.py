@@ -0,0 +1,68 @@
+import multiprocessing as mp
+import os
+
+import pandas as pd
+import pytest
+
+from pytrends import runner
+from pytrends.runner import ShardedRunner, make_tasks
+
+# the fake TrendReq is patched in the parent and only reaches workers that are forked
+pytestmark = pytest.mark.skipif(mp.get_start_method() != 'fork',
+                                reason='needs the fork start method')
+
+
+class FakeTrendReq(object):
+    def __init__(self, hl='en-US', tz=360, proxies=''):
+        if proxies == ['bad']:
+            raise RuntimeError('could not get a cookie')
+        self.proxies = proxies
+
+    def build_payload(self, kw_list, cat=0, timeframe='today 5-y', geo='', gprop=''):
+        self.kw_list = kw_list
+
+    def interest_over_time(self):
+        if self.kw_list == ['die']:
+            os._exit(9)
+        if self.kw_list == ['fail']:
+            raise ValueError('no data')
+        return pd.DataFrame({self.kw_list[0]: [1, 2]})
+
+
+@pytest.fixture(autouse=True)
+def fake_trendreq(monkeypatch):
+    monkeypatch.setattr(runner, 'TrendReq', FakeTrendReq)
+
+
+def test_make_tasks_chunks_keywords():
+    tasks = make_tasks(['a', 'b', 'c'], geos=('US', 'GB'), chunk_size=2)
+    assert tasks == [(('a', 'b'), 'US', 'today 5-y'), (('a', 'b'), 'GB', 'today 5-y'),
+                     (('c',), 'US', 'today 5-y'), (('c',), 'GB', 'today 5-y')]
+
+
+def test_failing_tasks_are_retried_then_recorded(tmp_path):
+    tasks = make_tasks(['a', 'fail', 'b'], chunk_size=1)
+    run = ShardedRunner(processes=2, wait_time=0, max_attempts=2, out_dir=str(tmp_path),
+                        verbose=False)
+    results = run.run(tasks)
+    assert sorted(task[0] for task in results) == [('a',), ('b',)]
+    assert run.errors == {(('fail',), '', 'today 5-y'): 'no data'}
+    assert os.listdir(tmp_path) == []
+
+
+def test_tasks_of_a_dead_worker_are_retried_by_the_others():
+    tasks = make_tasks(['die', 'a', 'b', 'c'], chunk_size=1)
+    # the first worker can not start and a worker dies on each of the two attempts of 'die',
+    # which leaves one worker for the other tasks
+    run = ShardedRunner(processes=4, proxies=['bad', 'p1', 'p2', 'p3'], wait_time=0,
+                        max_attempts=2, verbose=False)
+    results = run.run(tasks)
+    assert sorted(task[0] for task in results) == [('a',), ('b',), ('c',)]
+    assert run.errors == {(('die',), '', 'today 5-y'): 'worker exited with code 9'}
+
+
+def test_proxies_are_split_between_the_started_workers():
+    run = ShardedRunner(processes=4, proxies=['p1', 'p2', 'p3', 'p4'])
+    # only two workers are started for two tasks, so each gets half of the proxies
+    assert run._shard_proxies(0, 2) == ['p1', 'p3']
+    assert run._shard_proxies(1, 2) == ['p2', 'p4']
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from pytrends.suggestions import SuggestionIndex
+
+
+class FakeTrendReq(object):
+    def __init__(self, topics=None):
+        self.topics = topics or dict()
+        self.calls = list()
+        self._lock = threading.Lock()
+
+    def suggestions(self, keyword):
+        with self._lock:
+            self.calls.append(keyword)
+        return self.topics.get(keyword.lower().strip(), [{'mid': f'/m/{keyword}', 'title': keyword}])
+
+
+def test_misses_are_fetched_once_per_normalized_keyword(tmp_path):
+    client = FakeTrendReq()
+    index = SuggestionIndex(client, path=str(tmp_path / 'cache.json'))
+    result = index.suggestions_many(['Python', 'python ', 'PYTHON', 'java'])
+    assert sorted(keyword.lower().strip() for keyword in client.calls) == ['java', 'python']
+    assert result['python '] == result['Python']
+    index.close()
+
+    # a new index reads the saved cache and sends no request
+    client = FakeTrendReq()
+    index = SuggestionIndex(client, path=str(tmp_path / 'cache.json'))
+    assert index.suggestions('java') == [{'mid': '/m/java', 'title': 'java'}]
+    assert client.calls == []
+    index.close()
+
+
+def test_stale_entry_is_served_and_refreshed_in_the_background():
+    client = FakeTrendReq({'python': [{'mid': '/m/1', 'title': 'Python'}]})
+    index = SuggestionIndex(client, path=None, ttl=60)
+    index.suggestions('python')
+    index.entries['python']['fetched'] = time.time() - 120
+
+    client.topics['python'] = [{'mid': '/m/2', 'title': 'Python (language)'}]
+    # the stale topics are returned right away
+    assert index.suggestions('python') == [{'mid': '/m/1', 'title': 'Python'}]
+    index.close()
+    assert client.calls == ['python', 'python']
+    assert index.cached('python') == [{'mid': '/m/2', 'title': 'Python (language)'}]
+
+
+def test_prefix_matches_keywords_and_titles():
+    client = FakeTrendReq({
+        'python': [{'mid': '/m/1', 'title': 'Python'}, {'mid': '/m/2', 'title': 'Monty Python'}],
+        'pandas': [{'mid': '/m/3', 'title': 'Pandas'}, {'mid': '/m/1', 'title': 'Python'}],
+    })
+    index = SuggestionIndex(client, path=None)
+    index.suggestions_many(['python', 'pandas'])
+    # topics fetched for a matching keyword are returned whatever their title
+    assert [topic['mid'] for topic in index.prefix('py')] == ['/m/1', '/m/2']
+    assert [topic['mid'] for topic in index.prefix('pan')] == ['/m/3', '/m/1']
+    assert [topic['mid'] for topic in index.prefix('monty')] == ['/m/2']
+    assert sorted(topic['mid'] for topic in index.prefix('p')) == ['/m/1', '/m/2', '/m/3']
+    assert index.prefix('java') == []
+    index.close()
+
+
+def test_covered_keywords_are_answered_from_the_trie():
+    client = FakeTrendReq({'python': [{'mid': '/m/1', 'title': 'Python'}]})
+    index = SuggestionIndex(client, path=None)
+    index.suggestions('python')
+    assert index.suggestions('py') == [{'mid': '/m/1', 'title': 'Python'}]
+    assert index.suggestions_many(['pyt', 'java'])['pyt'] == [{'mid': '/m/1', 'title': 'Python'}]
+    assert client.calls == ['python', 'java']
+    index.close()
+
+    index = SuggestionIndex(client, path=None, prefix_hits=False)
+    index.suggestions('python')
+    index.suggestions('py')
+    assert client.calls[-2:] == ['python', 'py']
+    index.close()
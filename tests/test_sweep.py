@@ -0,0 +1,55 @@
+import json
+
+import requests
+
+from pytrends.exceptions import TooManyRequestsError
+from pytrends.request import TrendReq
+
+
+class SweepTrendReq(TrendReq):
+    """Answers explore and comparedgeo requests locally instead of asking Google"""
+
+    def GetGoogleCookie(self):
+        return {}
+
+    def _get_data(self, url, method=TrendReq.GET_METHOD, trim_chars=0, **kwargs):
+        if url == TrendReq.GENERAL_URL:
+            geo = json.loads(kwargs['params']['req'])['comparisonItem'][0]['geo']
+            if geo == 'YY':
+                raise TooManyRequestsError('quota reached', response=None)
+            if geo == 'XX':
+                # too little search volume, no geo map
+                return {'widgets': [{'id': 'TIMESERIES', 'request': {}, 'token': 't'}]}
+            return {'widgets': [{'id': 'GEO_MAP', 'token': geo,
+                                 'request': {'resolution': 'REGION', 'geo': {'country': geo}}}]}
+        request = json.loads(kwargs['params']['req'])
+        geo = kwargs['params']['token']
+        if (geo, request['resolution']) == ('GB', 'CITY'):
+            raise requests.exceptions.ConnectionError('connection reset')
+        return {'default': {'geoMapData': [
+            {'geoName': f'{geo} {request["resolution"]} {i}', 'geoCode': f'{geo}-{i}', 'value': [i, 2 * i]}
+            for i in range(2)]}}
+
+
+def test_sweep_skips_unsupported_resolutions_and_geos_without_geo_map(capsys):
+    pytrends = SweepTrendReq()
+    df = pytrends.interest_by_region_sweep(['a', 'b'], ['US', 'GB', 'XX'],
+                                           resolutions=['REGION', 'DMA'], max_workers=4)
+    assert sorted(set(zip(df.index.get_level_values('geo'), df.resolution))) == [
+        ('GB', 'REGION'), ('US', 'DMA'), ('US', 'REGION')]
+    # every row is labelled with the resolution that was sent
+    assert all(sub.split()[1] == res for (_, sub), res in zip(df.index, df.resolution))
+    assert df.sort_index().loc[('US', 'US DMA 1')].set_index('keyword').value.to_dict() == {'a': 1, 'b': 2}
+    out = capsys.readouterr().out
+    assert 'XX' in out and 'DMA is not available for GB' in out
+
+
+def test_sweep_skips_geos_and_resolutions_whose_request_failed(capsys):
+    pytrends = SweepTrendReq()
+    df = pytrends.interest_by_region_sweep(['a'], ['US', 'YY', 'GB'],
+                                           resolutions=['REGION', 'CITY'], max_workers=4)
+    assert sorted(set(zip(df.index.get_level_values('geo'), df.resolution))) == [
+        ('GB', 'REGION'), ('US', 'CITY'), ('US', 'REGION')]
+    out = capsys.readouterr().out
+    assert 'Could not explore YY (quota reached)' in out
+    assert 'Could not get CITY interest by region for GB (connection reset)' in out
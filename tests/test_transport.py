@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import pytest
+
+pytest.importorskip('httpx')
+pytest.importorskip('h2')
+
+from h2stub import H2StubServer  # noqa: E402
+from pytrends.request import TrendReq  # noqa: E402
+from pytrends.transport import HTTP2Transport  # noqa: E402
+
+PAYLOAD = {'default': {'rankedList': [{'rankedKeyword': [{'query': 'ai', 'value': 100}]}]}}
+BODY = b")]}',\n" + json.dumps(PAYLOAD).encode('utf-8')
+
+
+def test_http2_transport_decodes_compressed_response():
+    with H2StubServer(BODY) as server:
+        transport = HTTP2Transport(http1=False)
+        response = transport.request('get', f'{server.url}/trends/api/widgetdata/relatedsearches',
+                                     headers={'accept-language': 'en-US'},
+                                     cookies={'NID': 'abc'}, timeout=(2, 5),
+                                     params={'tz': 360})
+        transport.close()
+    assert response.http_version == 'HTTP/2'
+    assert response.content == BODY
+    assert json.loads(bytes(memoryview(response.content)[5:])) == PAYLOAD
+
+
+def test_http2_transport_multiplexes_concurrent_requests():
+    with H2StubServer(BODY, delay=0.2) as server:
+        transport = HTTP2Transport(http1=False)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(
+                lambda i: transport.request('get', f'{server.url}/widget/{i}', timeout=(2, 5)),
+                range(8)))
+        transport.close()
+    assert all(r.status_code == 200 for r in responses)
+    assert server.connections == 1
+    assert server.requests == 8
+    assert server.max_in_flight > 1
+
+
+def test_http2_transport_rejects_requests_only_args():
+    transport = HTTP2Transport(http1=False)
+    with pytest.raises(TypeError, match='verify'):
+        transport.check_args({'verify': False})
+    with pytest.raises(ValueError, match='proxy'):
+        transport.request('get', 'http://127.0.0.1:1/', proxies={'https': 'http://proxy:8080'})
+    transport.close()
+
+
+def test_trendreq_rejects_rotating_proxies_with_http2_transport():
+    with pytest.raises(ValueError, match='rotate proxies'):
+        TrendReq(proxies=['https://127.0.0.1:1'], transport=HTTP2Transport())
@@ -0,0 +1,134 @@
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:  # the HTTP/2 transport is optional
+    httpx = None
+
+try:
+    import brotli  # noqa: F401 -- lets httpx decode 'br' responses
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+
+RETRY_STATUS_CODES = (500, 502, 504, 429)
+
+# the exceptions a failed request can raise, whichever transport sent it
+TRANSPORT_ERRORS = (requests.exceptions.RequestException,)
+if httpx is not None:
+    TRANSPORT_ERRORS += (httpx.HTTPError,)
+
+
+class RequestsTransport(object):
+    """
+    HTTP/1.1 transport built on requests
+
+    A new session is used for every call, which is how TrendReq always sent its requests
+    """
+    # a different proxy can be used for every request
+    rotates_proxies = True
+
+    def __init__(self, retries=0, backoff_factor=0):
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    def check_args(self, requests_args):
+        """Raise if requests_args holds an option this transport can not send, requests takes them all"""
+        pass
+
+    def request(self, method, url, headers=None, cookies=None, proxies=None, timeout=None,
+                **kwargs):
+        """Send a request and return the requests.Response"""
+        s = requests.session()
+        # Retries mechanism. Activated when one of statements >0 (best used for proxy)
+        if self.retries > 0 or self.backoff_factor > 0:
+            retry = Retry(total=self.retries, read=self.retries,
+                          connect=self.retries,
+                          backoff_factor=self.backoff_factor,
+                          status_forcelist=RETRY_STATUS_CODES,
+                          method_whitelist=frozenset(['GET', 'POST']))
+            s.mount('https://', HTTPAdapter(max_retries=retry))
+
+        s.headers.update(headers or {})
+        if proxies:
+            s.proxies.update(proxies)
+        return s.request(method, url, timeout=timeout, cookies=cookies, **kwargs)
+
+    def close(self):
+        pass
+
+
+class HTTP2Transport(object):
+    """
+    HTTP/2 transport built on httpx
+
+    One client is kept for the lifetime of the transport, so every request to
+    trends.google.com is multiplexed over the same connection, including requests
+    sent concurrently from several threads. Compressed responses are decoded by httpx.
+
+    httpx sets proxies and TLS options per client rather than per request, so they are
+    given to the constructor; TrendReq(proxies=...) and the requests-only options in
+    requests_args are rejected instead of being silently ignored.
+    """
+    # httpx can not change proxies per request
+    rotates_proxies = False
+    # requests options with a different name in httpx
+    RENAMED_ARGS = {'allow_redirects': 'follow_redirects'}
+    # requests options httpx only takes per client, and where to pass them instead
+    CLIENT_ARGS = {
+        'proxies': 'pass proxy= to HTTP2Transport',
+        'verify': 'pass verify= to HTTP2Transport',
+        'cert': 'pass an ssl.SSLContext loading the certificate as verify= to HTTP2Transport',
+        'stream': 'it is not supported',
+        'hooks': 'it is not supported',
+    }
+
+    def __init__(self, retries=0, proxy=None, verify=True, http1=True):
+        """
+        :param retries: how many times a failed connection is retried
+        :param proxy: the proxy url every request is sent through
+        :param verify: whether TLS certificates are verified, or an ssl.SSLContext
+        :param http1: whether HTTP/1.1 may be used when a server does not negotiate HTTP/2;
+            if False, HTTP/2 is also spoken to plain http:// urls (e.g. a local h2c server)
+        """
+        if httpx is None:
+            raise ImportError('HTTP2Transport requires httpx, install it with: pip install "httpx[http2]"')
+        self.client = httpx.Client(
+            transport=httpx.HTTPTransport(http1=http1, http2=True, retries=retries,
+                                          proxy=proxy, verify=verify),
+            headers={'accept-encoding': ACCEPT_ENCODING},
+        )
+
+    def check_args(self, requests_args):
+        """Raise a TypeError if requests_args holds an option httpx can not take per request"""
+        for name in requests_args:
+            if name in self.CLIENT_ARGS:
+                raise TypeError(f'HTTP2Transport can not send {name!r} per request, '
+                                f'{self.CLIENT_ARGS[name]}')
+
+    def request(self, method, url, headers=None, cookies=None, proxies=None, timeout=None,
+                **kwargs):
+        """Send a request and return the httpx.Response"""
+        if proxies:
+            raise ValueError('HTTP2Transport can not change proxies per request, '
+                             'pass proxy= to HTTP2Transport instead')
+        self.check_args(kwargs)
+        for name, httpx_name in self.RENAMED_ARGS.items():
+            if name in kwargs:
+                kwargs[httpx_name] = kwargs.pop(name)
+        headers = dict(headers or {})
+        if cookies:
+            # per-request cookies are deprecated in httpx, send them as a header instead
+            headers['cookie'] = '; '.join(f'{name}={value}' for name, value in cookies.items())
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        return self.client.request(method.upper(), url, headers=headers, timeout=timeout,
+                                   **kwargs)
+
+    def close(self):
+        self.client.close()